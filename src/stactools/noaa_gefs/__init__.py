@@ -1,13 +1,25 @@
+from typing import TYPE_CHECKING, Any
+
 import stactools.core
 from stactools.cli.registry import Registry
 
-from stactools.noaa_gefs.stac import create_collection, create_item
+if TYPE_CHECKING:
+    from stactools.noaa_gefs.stac import create_collection, create_item
 
 __all__ = ["create_collection", "create_item"]
 
 stactools.core.use_fsspec()
 
 
+def __getattr__(name: str) -> Any:
+    # Import the stac module lazily as it loads rasterio (and GDAL)
+    if name in __all__:
+        from stactools.noaa_gefs import stac
+
+        return getattr(stac, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def register_plugin(registry: Registry) -> None:
     from stactools.noaa_gefs import commands
 
@@ -1,12 +1,11 @@
 import logging
+import os
 from typing import Optional
 
 import click
 from click import Command, Group
 from pystac import Collection
 
-from stactools.noaa_gefs import stac
-
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +51,8 @@ def create_noaagefs_command(cli: Group) -> Command:
         Args:
             destination (str): An HREF for the Collection JSON
         """
+        from stactools.noaa_gefs import stac
+
         collection = stac.create_collection(thumbnail, start_time)
         if len(id) > 0:
             collection.id = id
@@ -69,8 +70,14 @@ def create_noaagefs_command(cli: Group) -> Command:
         help="An HREF to the Collection JSON. "
         "This adds the collection details to the item, but doesn't add the item to the collection.",
     )
+    @click.option(
+        "--stats/--no-stats",
+        default=False,
+        help="Compute (approximate) statistics for each band, defaults to no statistics. "
+        "This requires reading all pixels of the GRIB2 file.",
+    )
     def create_item_command(
-        source: str, destination: str, collection: str = ""
+        source: str, destination: str, collection: str = "", stats: bool = False
     ) -> None:
         """Creates a STAC Item
 
@@ -78,13 +85,67 @@ def create_noaagefs_command(cli: Group) -> Command:
             source (str): HREF of the Asset associated with the Item
             destination (str): An HREF for the STAC Item
         """
+        from stactools.noaa_gefs import stac
+
         stac_collection = None
         if len(collection) > 0:
             stac_collection = Collection.from_file(collection)
 
-        item = stac.create_item(source, stac_collection)
+        item = stac.create_item(source, stac_collection, compute_stats=stats)
         item.save_object(dest_href=destination)
 
         return None
 
+    @noaagefs.command("create-items", short_help="Create multiple STAC items")
+    @click.argument("sources")
+    @click.argument("destination")
+    @click.option(
+        "--collection",
+        default="",
+        help="An HREF to the Collection JSON. "
+        "This adds the collection details to the items, "
+        "but doesn't add the items to the collection.",
+    )
+    @click.option(
+        "--stats/--no-stats",
+        default=False,
+        help="Compute (approximate) statistics for each band, defaults to no statistics. "
+        "This requires reading all pixels of the GRIB2 file.",
+    )
+    @click.option(
+        "--max-workers",
+        default=None,
+        type=int,
+        help="The number of processes, defaults to the number of CPUs",
+    )
+    def create_items_command(
+        sources: str,
+        destination: str,
+        collection: str = "",
+        stats: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Creates multiple STAC Items in parallel
+
+        Args:
+            sources (str): A text file with one HREF of an Asset per line
+            destination (str): A folder for the STAC Items (named by Item ID)
+        """
+        from stactools.noaa_gefs import stac
+
+        stac_collection = None
+        if len(collection) > 0:
+            stac_collection = Collection.from_file(collection)
+
+        with open(sources) as f:
+            hrefs = [line.strip() for line in f if len(line.strip()) > 0]
+
+        items = stac.create_items_parallel(
+            hrefs, stac_collection, compute_stats=stats, max_workers=max_workers
+        )
+        for item in items:
+            item.save_object(dest_href=os.path.join(destination, f"{item.id}.json"))
+
+        return None
+
     return noaagefs
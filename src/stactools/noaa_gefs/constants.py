@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 from pystac import Link, Provider, ProviderRole, RelType
 
 FORECAST_EXTENSION = "https://stac-extensions.github.io/forecast/v0.1.0/schema.json"
@@ -34,6 +36,56 @@ PROVIDERS = [
 
 ID_SEP = "-"
 
+# West, north, east, south - as used for the items generated from rasterio bounds
+GLOBAL_BBOX = [-180.0, 90.0, 180.0, -90.0]
+
+# The CRS of the GEFS products as read by GDAL (a sphere with a radius of 6371229 m),
+# which has no EPSG code
+GEFS_PROJJSON: Dict[str, Any] = {
+    "$schema": "https://proj.org/schemas/v0.7/projjson.schema.json",
+    "type": "GeographicCRS",
+    "name": "Coordinate System imported from GRIB file",
+    "datum": {
+        "type": "GeodeticReferenceFrame",
+        "name": "unnamed",
+        "ellipsoid": {"name": "Sphere", "radius": 6371229},
+    },
+    "coordinate_system": {
+        "subtype": "ellipsoidal",
+        "axis": [
+            {
+                "name": "Latitude",
+                "abbreviation": "lat",
+                "direction": "north",
+                "unit": "degree",
+            },
+            {
+                "name": "Longitude",
+                "abbreviation": "lon",
+                "direction": "east",
+                "unit": "degree",
+            },
+        ],
+    },
+}
+
+# The global latitude/longitude grids of the GEFS products as read by GDAL,
+# identified by the resolution in the file names (e.g. `gefs.chem.t00z.a2d_0p25.f000`)
+GRIDS: Dict[str, Dict[str, Any]] = {
+    "0p25": {
+        "bbox": [-180.125, 90.125, 179.875, -90.125],
+        "shape": [1440, 721],
+        "transform": [0.25, 0.0, -180.125, 0.0, -0.25, 90.125],
+        "projjson": GEFS_PROJJSON,
+    },
+    "0p50": {
+        "bbox": [-180.25, 90.25, 179.75, -90.25],
+        "shape": [720, 361],
+        "transform": [0.5, 0.0, -180.25, 0.0, -0.5, 90.25],
+        "projjson": GEFS_PROJJSON,
+    },
+}
+
 # I can't find a license that is directly associated with GEFS,
 # but https://www.emc.ncep.noaa.gov/emc/pages/numerical_forecast_systems/gefs/faq.php#
 # links to the URL below ("Disclaimer"), which claims it is "public domain" and
@@ -60,6 +112,8 @@ GRIB2_DESCRIPTION = (
 )
 GRIB2_MEDIATYPE = "application/wmo-GRIB2"
 GRIB2_ROLES = ["data", "source"]
+# Some source files don't have a file extension at all
+GRIB2_EXTENSIONS = (".grib2", ".grb2")
 
 IDX_KEY = "index"
 IDX_TITLE = "Index file"
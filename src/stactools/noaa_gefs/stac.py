@@ -1,11 +1,29 @@
+import contextlib
+import copy
+import functools
 import logging
 import os
 import re
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-import rasterio
-from dateutil.parser import isoparse
+import fsspec
 from isodate import duration_isoformat
 from pystac import (
     Asset,
@@ -19,14 +37,57 @@ from pystac import (
     TemporalExtent,
 )
 from pystac.extensions.item_assets import AssetDefinition, ItemAssetsExtension
-from pystac.extensions.projection import ProjectionExtension
 from pystac.utils import datetime_to_str
-from rasterio.crs import CRS
 
 from . import constants
 
+# rasterio (GDAL), dateutil and the projection extension are imported where needed,
+# so that importing this module (e.g. for creating collections) stays fast
+if TYPE_CHECKING:
+    from rasterio import Statistics
+    from rasterio.io import DatasetReader
+
 logger = logging.getLogger(__name__)
 
+# GDAL configuration options used when reading GRIB2 files:
+# - GDAL_PAM_ENABLED: Read and write computed statistics from/to .aux.xml sidecar files
+# - CPL_VSIL_CURL_USE_HEAD: Don't send a HEAD request before reading remote files
+GDAL_ENV = {
+    "GDAL_PAM_ENABLED": "YES",
+    "CPL_VSIL_CURL_USE_HEAD": "NO",
+}
+
+# e.g. "0(Meteorological)" -> "Meteorological"
+_BRACKET_RE = re.compile(r"\d+\(([^\)]+)\)$")
+# e.g. "Temperature [K]" -> "Temperature"
+_UNIT_COMMENT_RE = re.compile(r"\s*\[[^\]]+\]$")
+
+# Band metadata that is collected for all bands to find common values
+STR_KEYS = ("GRIB_DISCIPLINE", "GRIB_ELEMENT", "GRIB_SHORT_NAME")
+INT_KEYS = ("GRIB_FORECAST_SECONDS", "GRIB_REF_TIME", "GRIB_VALID_TIME")
+# Band statistics cached by GDAL, in the order of rasterio's Statistics
+STATISTICS_KEYS = (
+    "STATISTICS_MINIMUM",
+    "STATISTICS_MAXIMUM",
+    "STATISTICS_MEAN",
+    "STATISTICS_STDDEV",
+)
+
+# Forecast time in index files, e.g. "3 hour fcst" or "0-6 hour acc fcst"
+_IDX_FORECAST_RE = re.compile(r"^(?:\d+-)?(\d+) (min|hour|day) (?:\w+ )?fcst$")
+_IDX_FORECAST_UNITS = {"min": 60, "hour": 3600, "day": 86400}
+
+# GDAL virtual file systems that can be checked with fsspec
+_VSI_PROTOCOLS = {
+    "/vsicurl/": "",
+    "/vsis3/": "s3://",
+    "/vsigs/": "gs://",
+    "/vsiaz/": "az://",
+}
+
+# Grid resolution in file names, e.g. "geavg.t00z.pgrb2a.0p50.f000"
+_GRID_RE = re.compile(r"(?:^|[._])(\d+p\d+)(?:[._]|$)")
+
 
 def create_collection(
     thumbnail: str = "",
@@ -46,6 +107,8 @@ def create_collection(
     if start_time is None:
         start_datetime = datetime.now(tz=timezone.utc)
     else:
+        from dateutil.parser import isoparse
+
         start_datetime = isoparse(start_time)
 
     extent = Extent(
@@ -89,13 +152,10 @@ def create_collection(
             ),
         )
 
-    item_assets = {}
-
-    asset = create_grib2_asset()
-    item_assets[constants.GRIB2_KEY] = AssetDefinition(asset)
-
-    idx_asset = create_idx_asset()
-    item_assets[constants.IDX_KEY] = AssetDefinition(idx_asset)
+    item_assets = {
+        constants.GRIB2_KEY: AssetDefinition(create_grib2_asset()),
+        constants.IDX_KEY: AssetDefinition(create_idx_asset()),
+    }
 
     item_assets_attrs = ItemAssetsExtension.ext(collection, add_if_missing=True)
     item_assets_attrs.item_assets = item_assets
@@ -106,6 +166,9 @@ def create_collection(
 def create_item(
     asset_href: str,
     collection: Optional[Collection] = None,
+    compute_stats: bool = False,
+    approx_stats: bool = True,
+    dir_listings: Optional[Dict[str, FrozenSet[str]]] = None,
 ) -> Item:
     """Create a STAC Item
 
@@ -117,23 +180,46 @@ def create_item(
     Args:
         asset_href (str): The HREF pointing to an asset associated with the item
         collection (pystac.Collection): HREF to an existing collection
+        compute_stats (bool): Whether to compute statistics for each band,
+            which requires GDAL to read the pixels of all bands
+        approx_stats (bool): Whether to compute approximate statistics based on
+            overviews or a subset of the pixels instead of reading all pixels
+        dir_listings (dict): Directory listings to look up the index files in,
+            shared between the items of a batch (see `create_items`)
 
     Returns:
         Item: STAC Item object
     """
-    with rasterio.open(asset_href, driver="GRIB") as dataset:
+    import rasterio
+    from pystac.extensions.projection import ProjectionExtension
+    from rasterio.crs import CRS
+    from rasterio.env import hasenv
+
+    # Don't set up a GDAL environment if one is active already (e.g. in create_items)
+    env = contextlib.nullcontext() if hasenv() else rasterio.Env(**GDAL_ENV)
+    with env, rasterio.open(asset_href, driver="GRIB") as dataset:
 
         # Go through bands and collect metadata
-        band_numbers = range(1, dataset.count)
-        discipline = set()
-        element = set()
-        forecast_seconds = set()
-        ref_time = set()
-        short_name = set()
-        forecast_time = set()
+        band_numbers = range(1, dataset.count + 1)
+        band_cache: List[Dict[str, Any]] = []
+        # rasterio builds these tuples for all bands on each access
+        band_properties = {
+            "dtype": dataset.dtypes,
+            "description": dataset.descriptions,
+            "unit": dataset.units,
+            "offset": dataset.offsets,
+            "scale": dataset.scales,
+        }
+        str_values: DefaultDict[str, Set[str]] = defaultdict(set)
+        int_values: DefaultDict[str, Set[int]] = defaultdict(set)
         center = set()
         for i in band_numbers:
-            meta = dataset.tags(i)
+            # Cache the band metadata so that GDAL is only queried once per band
+            cached = extract_band_metadata(
+                dataset, i, band_properties, compute_stats, approx_stats
+            )
+            band_cache.append(cached)
+            meta = cached["tags"]
             # "GRIB_DISCIPLINE": "0(Meteorological)",
             # "GRIB_ELEMENT": "SCTAOTK",
             # "GRIB_FORECAST_SECONDS": "0",
@@ -151,237 +237,685 @@ def create_item(
             # "GRIB_VALID_TIME": "1660262400",
 
             # Collection values in metadata
-            if "GRIB_DISCIPLINE" in meta:
-                discipline.add(meta["GRIB_DISCIPLINE"])
-            if "GRIB_ELEMENT" in meta:
-                element.add(meta["GRIB_ELEMENT"])
-            if "GRIB_FORECAST_SECONDS" in meta:
-                forecast_seconds.add(int(meta["GRIB_FORECAST_SECONDS"]))
-            if "GRIB_REF_TIME" in meta:
-                ref_time.add(int(meta["GRIB_REF_TIME"]))
-            if "GRIB_SHORT_NAME" in meta:
-                short_name.add(meta["GRIB_SHORT_NAME"])
-            if "GRIB_VALID_TIME" in meta:
-                forecast_time.add(int(meta["GRIB_VALID_TIME"]))
+            for key in STR_KEYS:
+                value = meta.get(key)
+                if value is not None:
+                    str_values[key].add(value)
+            for key in INT_KEYS:
+                value = meta.get(key)
+                if value is not None:
+                    int_values[key].add(int(value))
             # todo: parse SIGNF_REF_TIME=1(Start_of_Forecast)?
             # https://www.nco.ncep.noaa.gov/pmb/docs/grib2/grib2_doc/grib2_table1-2.shtml
 
             # Parse GRIB IDs field
-            grib_ids = dict()
-            if "GRIB_IDS" in meta:
-                entries = meta["GRIB_IDS"].split()
-                for entry in entries:
-                    try:
-                        [key, value] = entry.split("=", 1)
-                        grib_ids[key] = value
-                    except ValueError:
-                        continue
+            grib_ids = parse_grib_ids(meta.get("GRIB_IDS", ""))
 
             # Collection values in parsed GRIB IDs
-            if "CENTER" in grib_ids and grib_ids["CENTER"] != 0:
+            if "CENTER" in grib_ids and grib_ids["CENTER"] != "0":
                 code = grib_ids["CENTER"]
                 if "SUBCENTER" in grib_ids and grib_ids["SUBCENTER"] != "0":
                     code += " "
                     code += grib_ids["SUBCENTER"]
                 center.add(code)
 
-        forecast_timestamps: List[Optional[int]] = []
-        if len(forecast_time) == 1:
-            forecast_timestamps.append(forecast_time.pop())
-        elif len(forecast_time) == 2:
-            forecast_timestamps.append(min(forecast_time))
-            forecast_timestamps.append(max(forecast_time))
-        elif len(forecast_time) > 2:
-            forecast_timestamps.append(min(forecast_time))
-            forecast_timestamps.append(None)
-
-        forecast_datetimes: List[Optional[datetime]] = []
-        for timestamp in forecast_timestamps:
-            forecast_datetimes.append(
-                None if timestamp is None else timestamp_to_datetime(timestamp)
-            )
-
-        # Compile information for the item
-        id_parts = list(map(lambda ts: str(ts), forecast_timestamps))
-        basename = os.path.basename(asset_href)
-        [filename, ext] = os.path.splitext(basename)
-        # Some source files don't have the .grib2 extension!
-        if ext != ".grib2" and ext != ".grb2":
-            filename = basename
-        id_parts.append(filename)
+        discipline = str_values["GRIB_DISCIPLINE"]
+        element = str_values["GRIB_ELEMENT"]
+        forecast_seconds = int_values["GRIB_FORECAST_SECONDS"]
+        ref_time = int_values["GRIB_REF_TIME"]
+        forecast_time = int_values["GRIB_VALID_TIME"]
 
         [w, s, e, n] = dataset.bounds
-        bbox = [w, n, e, s]
-        geometry = bbox_to_polygon(bbox)
-
-        add_ts_ext = False
-        stac_extensions = [constants.RASTER_EXTENSION]
-        if len(forecast_seconds) > 0 or len(forecast_time) > 0:
-            stac_extensions.append(constants.FORECAST_EXTENSION)
-
-        # Add properties to Item - common data has been extracted from the bands
-        properties: Dict[str, Any] = {}
-        forecast_datetime_instance: Optional[datetime] = None
-        if len(forecast_datetimes) == 1:
-            forecast_datetime_instance = forecast_datetimes[0]
-            if forecast_datetime_instance is not None:
-                properties["expires"] = temporal_to_iso(forecast_datetime_instance)
-            add_ts_ext = True
-        elif len(forecast_datetimes) == 2:
-            properties["start_datetime"] = forecast_datetimes[0]
-            properties["end_datetime"] = forecast_datetimes[1]
-            if properties["end_datetime"] is not None:
-                properties["expires"] = temporal_to_iso(properties["end_datetime"])
-                add_ts_ext = True
-
-        if len(discipline) == 1:
-            properties["grib:discipline"] = parse_discipline(discipline.pop())
-
-        if len(element) == 1:
-            properties["grib:element"] = parse_bracket_str(element.pop())
-
-        if len(ref_time) == 1:
-            dt = temporal_to_iso(ref_time.pop())
-            properties["forecast:reference_datetime"] = dt
-        elif len(ref_time) > 1:
-            raise Exception("Can't encode multiple reference datetimes")
-
-        if len(forecast_seconds) == 1:
-            properties["forecast:horizon"] = seconds_to_duration(forecast_seconds.pop())
-
-        if len(center) == 1:
-            properties["processing:facility"] = " ".join(
-                map(lambda f: parse_bracket_str(f), center.pop().split())
-            )
-
-        # Create the item
-        item = Item(
-            stac_extensions=stac_extensions,
-            id=constants.ID_SEP.join(id_parts),
-            properties=properties,
-            geometry=geometry,
-            bbox=bbox,
-            datetime=forecast_datetime_instance,
-            collection=collection,
+        item = create_base_item(
+            asset_href,
+            [w, n, e, s],
+            [constants.RASTER_EXTENSION],
+            discipline,
+            element,
+            forecast_seconds,
+            ref_time,
+            forecast_time,
+            center,
+            collection,
         )
 
         # Projection extension
         proj_attrs = ProjectionExtension.ext(item, add_if_missing=True)
         if isinstance(dataset.crs, CRS):
-            proj_attrs.epsg = None
-            proj_attrs.projjson = dataset.crs.to_dict(projjson=True)
+            # PROJJSON is only needed if the CRS can't be given as EPSG code
+            wkt = dataset.crs.wkt
+            proj_attrs.epsg = wkt_to_epsg(wkt)
+            if proj_attrs.epsg is None:
+                proj_attrs.projjson = copy.deepcopy(wkt_to_projjson(wkt))
         if len(dataset.shape) == 2:
             proj_attrs.shape = [dataset.shape[1], dataset.shape[0]]
-        if dataset.transform:
-            proj_attrs.transform = list(dataset.transform)[0:6]
+        t = dataset.transform
+        if t:
+            proj_attrs.transform = [t.a, t.b, t.c, t.d, t.e, t.f]
 
         # Add Grib2 asset to the item (was filled above)
+        # Values that differ between the bands are given per band
+        per_band_discipline = len(discipline) > 1
+        per_band_element = len(element) > 1
+        per_band_horizon = len(forecast_seconds) > 1
+        per_band_time = len(forecast_time) > 1
         asset = create_grib2_asset(asset_href)
-        asset["raster:bands"] = []
-        for i in band_numbers:
-            stats = dataset.statistics(i)
-            band = {
-                # todo: check whether this is always valid
-                "data_type": dataset.dtypes[i],
-                "statistics": {
-                    "minimum": stats.min,
-                    "maximum": stats.max,
-                    "mean": stats.mean,
-                    "stddev": stats.std,
-                },
-            }
-
-            meta = dataset.tags(i)
-
-            if "GRIB_COMMENT" in meta:
-                # Remove the unit from the comment
-                band["description"] = re.sub(
-                    r"\s*\[[^\]]+\]$", "", meta["GRIB_COMMENT"]
-                )
-            elif dataset.descriptions[i] is not None:
-                band["description"] = dataset.descriptions[i]
-
-            if "GRIB_UNIT" in meta:
-                # Remove the square brackets from the unit
-                unit = meta["GRIB_UNIT"].strip("[]")
-                # Numeric is not a valid value
-                if unit != "Numeric":
-                    band["unit"] = unit
-            elif dataset.units[i] is not None:
-                band["unit"] = dataset.units[i]
-
-            offset = dataset.offsets[i]
-            scale = dataset.scales[i]
-            if scale != 1 or offset != 0:
-                band["scale"] = scale
-                band["offset"] = offset
-
-            if len(discipline) > 1 and "GRIB_DISCIPLINE" in meta:
-                band["grib:discipline"] = parse_discipline(meta["GRIB_DISCIPLINE"])
-
-            if len(element) > 1 and "GRIB_ELEMENT" in meta:
-                band["grib:element"] = parse_discipline(meta["GRIB_ELEMENT"])
-
-            if "GRIB_SHORT_NAME" in meta:
-                band["grib:short_name"] = meta["GRIB_SHORT_NAME"]
-
-            if len(forecast_seconds) > 1 and "GRIB_FORECAST_SECONDS" in meta:
-                band["forecast:horizon"] = seconds_to_duration(
-                    meta["GRIB_FORECAST_SECONDS"]
-                )
-
-            if len(forecast_time) > 1 and "GRIB_VALID_TIME" in meta:
-                dt = temporal_to_iso(meta["GRIB_VALID_TIME"])
-                band["datetime"] = dt
-                band["expires"] = dt
-                add_ts_ext = True
-
-            asset["raster:bands"].append(band)
+        asset["raster:bands"] = [
+            create_raster_band(
+                cached,
+                per_band_discipline,
+                per_band_element,
+                per_band_horizon,
+                per_band_time,
+            )
+            for cached in band_cache
+        ]
+        if (
+            any("expires" in band for band in asset["raster:bands"])
+            and constants.TIMESTAMPS_EXTENSION not in item.stac_extensions
+        ):
+            item.stac_extensions.append(constants.TIMESTAMPS_EXTENSION)
 
         item.add_asset(constants.GRIB2_KEY, Asset.from_dict(asset))
 
         # Add Index assets to the item (if available)
-        idx_href = asset_href + ".idx"
-        if os.path.exists(idx_href):
+        idx_href = find_idx_href(asset_href, dir_listings)
+        if idx_href is not None:
             idx_asset = create_idx_asset(idx_href)
             item.add_asset(constants.IDX_KEY, Asset.from_dict(idx_asset))
 
-        if add_ts_ext:
-            item.stac_extensions.append(constants.TIMESTAMPS_EXTENSION)
-
         return item
 
 
-def create_grib2_asset(href: Optional[str] = None) -> Dict[str, Any]:
-    asset: Dict[str, Any] = {
-        "roles": constants.GRIB2_ROLES,
-        "type": constants.GRIB2_MEDIATYPE,
-        "title": constants.GRIB2_TITLE,
-        "description": constants.GRIB2_DESCRIPTION,
+def create_items(
+    asset_hrefs: Iterable[str],
+    collection: Optional[Collection] = None,
+    compute_stats: bool = False,
+    approx_stats: bool = True,
+) -> List[Item]:
+    """Create STAC Items for multiple GRIB2 files
+
+    All files are read in the same GDAL environment instead of setting up a new
+    environment for each file, and each directory is only listed once to find
+    the index files. The items are returned once all files are read, so that
+    the GDAL environment doesn't stay active.
+
+    Args:
+        asset_hrefs (iterable): The HREFs pointing to the GRIB2 files
+        collection (pystac.Collection): The collection to add to the items
+        compute_stats (bool): Whether to compute statistics for each band
+        approx_stats (bool): Whether to compute approximate statistics
+
+    Returns:
+        List[Item]: The STAC Items, in the order of the HREFs
+    """
+    import rasterio
+
+    # Files in the same directory share a single listing to look up the index files
+    dir_listings: Dict[str, FrozenSet[str]] = {}
+    with rasterio.Env(**GDAL_ENV):
+        return [
+            create_item(
+                asset_href, collection, compute_stats, approx_stats, dir_listings
+            )
+            for asset_href in asset_hrefs
+        ]
+
+
+# Directory listings of a worker process of create_items_parallel, shared by
+# all items that the process creates in a batch
+_worker_dir_listings: Dict[str, FrozenSet[str]] = {}
+
+
+def init_worker() -> None:
+    # Forked processes inherit the listings of the parent process
+    _worker_dir_listings.clear()
+
+
+def create_item_in_worker(
+    asset_href: str,
+    collection: Optional[Collection] = None,
+    compute_stats: bool = False,
+    approx_stats: bool = True,
+) -> Item:
+    return create_item(
+        asset_href, collection, compute_stats, approx_stats, _worker_dir_listings
+    )
+
+
+def create_items_parallel(
+    asset_hrefs: Iterable[str],
+    collection: Optional[Collection] = None,
+    compute_stats: bool = False,
+    approx_stats: bool = True,
+    max_workers: Optional[int] = None,
+) -> Iterator[Item]:
+    """Create STAC Items for multiple GRIB2 files in parallel processes
+
+    Processes are used instead of threads as computing the statistics is
+    CPU-bound. The collection is sent to the worker processes, so it must be
+    picklable. Each process lists each directory only once to find the index files.
+
+    Only a few files per process are queued at a time. If creating an item fails
+    or the iteration is stopped early, the queued files are not processed.
+
+    Args:
+        asset_hrefs (iterable): The HREFs pointing to the GRIB2 files
+        collection (pystac.Collection): The collection to add to the items
+        compute_stats (bool): Whether to compute statistics for each band
+        approx_stats (bool): Whether to compute approximate statistics
+        max_workers (int): The number of processes, defaults to the number of CPUs
+
+    Returns:
+        Iterator[Item]: The STAC Items, in the order of the HREFs
+    """
+    create = functools.partial(
+        create_item_in_worker,
+        collection=collection,
+        compute_stats=compute_stats,
+        approx_stats=approx_stats,
+    )
+    workers = max_workers or os.cpu_count() or 1
+    pending: Deque["Future[Item]"] = deque()
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_worker
+    ) as executor:
+        try:
+            for asset_href in asset_hrefs:
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+                # Each HREF is a separate task so that small batches use all
+                # processes, reading a GRIB2 file takes much longer than pickling
+                # the collection
+                pending.append(executor.submit(create, asset_href))
+            while len(pending) > 0:
+                yield pending.popleft().result()
+        finally:
+            # Don't wait for the queued files when leaving the executor
+            for future in pending:
+                future.cancel()
+
+
+def create_item_from_idx(
+    idx_href: str,
+    grib_href: str,
+    collection: Optional[Collection] = None,
+) -> Item:
+    """Create a STAC Item from the index sidecar file of a GRIB2 file
+
+    The GRIB2 file itself is not opened, which avoids reading all GRIB messages
+    (e.g. through HTTP range requests for remote files). The index file doesn't
+    contain information about the grid, bands and originating center.
+    The grid and CRS are derived from the resolution in the file name for the
+    known GEFS grids, otherwise the Item has a global bounding box and no
+    projection information.
+    A ValueError is raised if the index file has no messages with forecast times.
+
+    Args:
+        idx_href (str): The HREF pointing to the index file
+        grib_href (str): The HREF pointing to the GRIB2 file
+        collection (pystac.Collection): The collection to add to the item
+
+    Returns:
+        Item: STAC Item object
+    """
+    element = set()
+    forecast_seconds = set()
+    ref_time = set()
+    forecast_time = set()
+    with fsspec.open(idx_href, "r") as f:
+        for line in f:
+            message = parse_idx_line(line)
+            if message is None:
+                continue
+            element.add(message["element"])
+            ref_time.add(message["ref_time"])
+            if "forecast_seconds" in message:
+                forecast_seconds.add(message["forecast_seconds"])
+                forecast_time.add(message["ref_time"] + message["forecast_seconds"])
+
+    if len(ref_time) == 0:
+        raise ValueError(f"No GRIB messages found in the index file {idx_href}")
+    if len(forecast_time) == 0:
+        raise ValueError(f"No forecast times found in the index file {idx_href}")
+
+    grid = find_grid(grib_href)
+    bbox = constants.GLOBAL_BBOX if grid is None else grid["bbox"]
+
+    item = create_base_item(
+        grib_href,
+        bbox.copy(),
+        [],
+        set(),
+        element,
+        forecast_seconds,
+        ref_time,
+        forecast_time,
+        set(),
+        collection,
+    )
+
+    if grid is not None:
+        from pystac.extensions.projection import ProjectionExtension
+
+        proj_attrs = ProjectionExtension.ext(item, add_if_missing=True)
+        proj_attrs.epsg = None
+        proj_attrs.projjson = copy.deepcopy(grid["projjson"])
+        proj_attrs.shape = grid["shape"].copy()
+        proj_attrs.transform = grid["transform"].copy()
+
+    item.add_asset(constants.GRIB2_KEY, Asset.from_dict(create_grib2_asset(grib_href)))
+    item.add_asset(constants.IDX_KEY, Asset.from_dict(create_idx_asset(idx_href)))
+
+    return item
+
+
+def find_grid(href: str) -> Optional[Dict[str, Any]]:
+    # The grid is derived from the resolution in the file name, None if unknown
+    match = _GRID_RE.search(os.path.basename(href))
+    if match is None:
+        return None
+    return constants.GRIDS.get(match.group(1))
+
+
+def parse_idx_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse a line of a GRIB2 index file
+
+    Lines look like `1:0:d=2022081200:HGT:10 mb:3 hour fcst:ENS=low-res ctl`,
+    i.e. message number, byte offset, reference time, element, level and
+    forecast time, followed by optional additional fields.
+
+    Args:
+        line (str): A line of the index file
+
+    Returns:
+        dict: The parsed values or None if the line can't be parsed
+    """
+    parts = line.strip().split(":")
+    if len(parts) < 6 or not parts[2].startswith("d="):
+        return None
+
+    try:
+        offset = int(parts[1])
+        reference = datetime.strptime(parts[2][2:], "%Y%m%d%H")
+    except ValueError:
+        return None
+
+    message: Dict[str, Any] = {
+        "offset": offset,
+        "ref_time": int(reference.replace(tzinfo=timezone.utc).timestamp()),
+        "element": parts[3],
+        "level": parts[4],
     }
+
+    if parts[5] == "anl":
+        message["forecast_seconds"] = 0
+    else:
+        match = _IDX_FORECAST_RE.match(parts[5])
+        if match is not None:
+            unit = _IDX_FORECAST_UNITS[match.group(2)]
+            message["forecast_seconds"] = int(match.group(1)) * unit
+
+    return message
+
+
+def extract_band_metadata(
+    dataset: "DatasetReader",
+    band: int,
+    band_properties: Dict[str, Tuple[Any, ...]],
+    compute_stats: bool = False,
+    approx_stats: bool = True,
+) -> Dict[str, Any]:
+    # band_properties holds a tuple per property with the values of all bands
+    metadata = {key: values[band - 1] for key, values in band_properties.items()}
+    metadata["tags"] = dataset.tags(band)
+    metadata["statistics"] = None
+    if compute_stats:
+        metadata["statistics"] = band_statistics(
+            dataset, band, metadata["tags"], approx_stats
+        )
+    return metadata
+
+
+def band_statistics(
+    dataset: "DatasetReader", band: int, tags: Dict[str, str], approx: bool
+) -> "Statistics":
+    """Get the statistics of a band, preferring statistics cached by GDAL
+
+    GDAL stores computed statistics in the band metadata, which is persisted
+    in a .aux.xml sidecar file. If they are available in the already read band
+    tags, they are used directly. Otherwise they are computed (and cached) by GDAL.
+
+    Args:
+        dataset (DatasetReader): The opened GRIB2 file
+        band (int): The band index (1-indexed)
+        tags (dict): The band tags
+        approx (bool): Whether approximate statistics are sufficient
+
+    Returns:
+        Statistics: The band statistics
+    """
+    if all(key in tags for key in STATISTICS_KEYS) and (
+        approx or tags.get("STATISTICS_APPROXIMATE") != "YES"
+    ):
+        from rasterio import Statistics
+
+        return Statistics(*(float(tags[key]) for key in STATISTICS_KEYS))
+    return dataset.statistics(band, approx=approx)
+
+
+def create_raster_band(
+    cached: Dict[str, Any],
+    per_band_discipline: bool,
+    per_band_element: bool,
+    per_band_horizon: bool,
+    per_band_time: bool,
+) -> Dict[str, Any]:
+    # Values that differ between the bands are only added if the flag is set,
+    # otherwise they are given in the item properties.
+    band: Dict[str, Any] = {
+        # todo: check whether this is always valid
+        "data_type": cached["dtype"],
+    }
+
+    stats = cached["statistics"]
+    if stats is not None:
+        band["statistics"] = {
+            "minimum": stats.min,
+            "maximum": stats.max,
+            "mean": stats.mean,
+            "stddev": stats.std,
+        }
+
+    meta = cached["tags"]
+
+    if "GRIB_COMMENT" in meta:
+        # Remove the unit from the comment
+        band["description"] = _UNIT_COMMENT_RE.sub("", meta["GRIB_COMMENT"])
+    elif cached["description"] is not None:
+        band["description"] = cached["description"]
+
+    if "GRIB_UNIT" in meta:
+        # Remove the square brackets from the unit
+        unit = meta["GRIB_UNIT"].strip("[]")
+        # Numeric is not a valid value
+        if unit != "Numeric":
+            band["unit"] = unit
+    elif cached["unit"] is not None:
+        band["unit"] = cached["unit"]
+
+    offset = cached["offset"]
+    scale = cached["scale"]
+    if scale != 1 or offset != 0:
+        band["scale"] = scale
+        band["offset"] = offset
+
+    if per_band_discipline and "GRIB_DISCIPLINE" in meta:
+        band["grib:discipline"] = parse_discipline(meta["GRIB_DISCIPLINE"])
+
+    if per_band_element and "GRIB_ELEMENT" in meta:
+        band["grib:element"] = parse_discipline(meta["GRIB_ELEMENT"])
+
+    if "GRIB_SHORT_NAME" in meta:
+        band["grib:short_name"] = meta["GRIB_SHORT_NAME"]
+
+    if per_band_horizon and "GRIB_FORECAST_SECONDS" in meta:
+        band["forecast:horizon"] = seconds_to_duration(
+            int(meta["GRIB_FORECAST_SECONDS"])
+        )
+
+    if per_band_time and "GRIB_VALID_TIME" in meta:
+        dt = temporal_to_iso(int(meta["GRIB_VALID_TIME"]))
+        band["datetime"] = dt
+        band["expires"] = dt
+
+    return band
+
+
+def create_base_item(
+    asset_href: str,
+    bbox: List[float],
+    stac_extensions: List[str],
+    discipline: Set[str],
+    element: Set[str],
+    forecast_seconds: Set[int],
+    ref_time: Set[int],
+    forecast_time: Set[int],
+    center: Set[str],
+    collection: Optional[Collection] = None,
+) -> Item:
+    # Properties are only set on the item if all GRIB messages share the value
+    n_disc = len(discipline)
+    n_elem = len(element)
+    n_ref = len(ref_time)
+    n_fs = len(forecast_seconds)
+    n_ft = len(forecast_time)
+
+    # A single valid time or a time range, which is open for more than two times
+    ts_lo: Optional[int] = None
+    ts_hi: Optional[int] = None
+    if n_ft == 1:
+        ts_lo = next(iter(forecast_time))
+    elif n_ft == 2:
+        ts_lo = min(forecast_time)
+        ts_hi = max(forecast_time)
+    elif n_ft > 2:
+        ts_lo = min(forecast_time)
+
+    # Compile information for the item
+    id_parts = []
+    if ts_lo is not None:
+        id_parts.append(str(ts_lo))
+        if n_ft > 1:
+            id_parts.append("open" if ts_hi is None else str(ts_hi))
+    basename = os.path.basename(asset_href)
+    [filename, ext] = os.path.splitext(basename)
+    # Some source files don't have the .grib2 extension!
+    if ext not in constants.GRIB2_EXTENSIONS:
+        filename = basename
+    id_parts.append(filename)
+
+    geometry = bbox_to_polygon(bbox)
+
+    add_ts_ext = False
+    if n_fs > 0 or n_ft > 0:
+        stac_extensions.append(constants.FORECAST_EXTENSION)
+
+    # Add properties to Item - common data has been extracted from the bands
+    properties: Dict[str, Any] = {}
+    forecast_datetime_instance: Optional[datetime] = None
+    if n_ft == 1 and ts_lo is not None:
+        forecast_datetime_instance = timestamp_to_datetime(ts_lo)
+        properties["expires"] = temporal_to_iso(forecast_datetime_instance)
+        add_ts_ext = True
+    elif n_ft > 1 and ts_lo is not None:
+        properties["start_datetime"] = temporal_to_iso(ts_lo)
+        properties["end_datetime"] = None
+        if ts_hi is not None:
+            properties["end_datetime"] = temporal_to_iso(ts_hi)
+            properties["expires"] = properties["end_datetime"]
+            add_ts_ext = True
+
+    if n_disc == 1:
+        properties["grib:discipline"] = parse_discipline(next(iter(discipline)))
+
+    if n_elem == 1:
+        properties["grib:element"] = parse_bracket_str(next(iter(element)))
+
+    if n_ref == 1:
+        dt = temporal_to_iso(next(iter(ref_time)))
+        properties["forecast:reference_datetime"] = dt
+    elif n_ref > 1:
+        raise Exception("Can't encode multiple reference datetimes")
+
+    if n_fs == 1:
+        properties["forecast:horizon"] = seconds_to_duration(
+            next(iter(forecast_seconds))
+        )
+
+    if len(center) == 1:
+        properties["processing:facility"] = " ".join(
+            parse_bracket_str(f) for f in next(iter(center)).split()
+        )
+
+    # Create the item
+    item = Item(
+        stac_extensions=stac_extensions,
+        id=constants.ID_SEP.join(id_parts),
+        properties=properties,
+        geometry=geometry,
+        bbox=bbox,
+        datetime=forecast_datetime_instance,
+        collection=collection,
+    )
+
+    if add_ts_ext:
+        item.stac_extensions.append(constants.TIMESTAMPS_EXTENSION)
+
+    return item
+
+
+# Static fields of the assets, copied for each asset (including the roles list)
+_GRIB2_TEMPLATE: Dict[str, Any] = {
+    "roles": constants.GRIB2_ROLES,
+    "type": constants.GRIB2_MEDIATYPE,
+    "title": constants.GRIB2_TITLE,
+    "description": constants.GRIB2_DESCRIPTION,
+}
+_IDX_TEMPLATE: Dict[str, Any] = {
+    "roles": constants.IDX_ROLES,
+    "type": constants.IDX_MEDIATYPE,
+    "title": constants.IDX_TITLE,
+    "description": constants.IDX_DESCRIPTION,
+}
+
+
+def create_grib2_asset(href: Optional[str] = None) -> Dict[str, Any]:
+    asset = _GRIB2_TEMPLATE.copy()
+    asset["roles"] = asset["roles"].copy()
     if href is not None:
         asset["href"] = href
     return asset
 
 
 def create_idx_asset(href: Optional[str] = None) -> Dict[str, Any]:
-    asset: Dict[str, Any] = {
-        "roles": constants.IDX_ROLES,
-        "type": constants.IDX_MEDIATYPE,
-        "title": constants.IDX_TITLE,
-        "description": constants.IDX_DESCRIPTION,
-    }
+    asset = _IDX_TEMPLATE.copy()
+    asset["roles"] = asset["roles"].copy()
     if href is not None:
         asset["href"] = href
     return asset
 
 
+def find_idx_href(
+    asset_href: str, dir_listings: Optional[Dict[str, FrozenSet[str]]] = None
+) -> Optional[str]:
+    """Find the index sidecar file of a GRIB2 file
+
+    The index file is usually named like the GRIB2 file with an additional .idx
+    extension (e.g. `file.grib2.idx`), otherwise `file.idx` is checked for GRIB2
+    files with a file extension.
+
+    Args:
+        asset_href (str): The HREF pointing to the GRIB2 file
+        dir_listings (dict): Directory listings to look up local files in,
+            which are added to if a directory is not listed yet. Files created
+            after listing their directory are not found.
+
+    Returns:
+        str: The HREF pointing to the index file or None if not found
+    """
+    idx_href = asset_href + ".idx"
+    if href_exists(idx_href, dir_listings):
+        return idx_href
+
+    [path, ext] = os.path.splitext(asset_href)
+    if ext in constants.GRIB2_EXTENSIONS and href_exists(path + ".idx", dir_listings):
+        return path + ".idx"
+
+    return None
+
+
+def href_exists(
+    href: str, dir_listings: Optional[Dict[str, FrozenSet[str]]] = None
+) -> bool:
+    """Check whether a file exists
+
+    Local files are looked up in the directory listings if given. Remote files
+    are checked with fsspec, which requires the fsspec implementation for the
+    protocol (e.g. s3fs for S3) to be installed. GDAL virtual file system paths
+    are translated to URLs for fsspec, which is only possible for
+    /vsicurl/, /vsis3/, /vsigs/ and /vsiaz/. Other paths (e.g. /vsizip/ or
+    /vsimem/) can't be checked and are reported as missing.
+    """
+    if href.startswith("/vsi"):
+        url = vsi_to_url(href)
+        if url is None:
+            logger.warning(f"Can't check whether {href} exists")
+            return False
+        href = url
+
+    if "://" not in href:
+        if dir_listings is None:
+            return os.path.exists(href)
+        # A single listing of the directory serves all files in the same directory
+        parent, name = os.path.split(os.path.abspath(href))
+        if parent not in dir_listings:
+            dir_listings[parent] = list_directory(parent)
+        # The listings only live as long as a batch, so trust them for the batch
+        return name in dir_listings[parent]
+
+    # Use fsspec so that remote files (e.g. on S3 or HTTP) can be checked, too
+    try:
+        fs, path = fsspec.core.url_to_fs(href)
+        return bool(fs.exists(path))
+    except (ImportError, OSError, ValueError) as e:
+        # e.g. missing fsspec implementation or credentials for the protocol
+        logger.warning(f"Can't check whether {href} exists: {e}")
+        return False
+
+
+def vsi_to_url(href: str) -> Optional[str]:
+    # e.g. "/vsis3/bucket/key" -> "s3://bucket/key"
+    for prefix, protocol in _VSI_PROTOCOLS.items():
+        if href.startswith(prefix):
+            return href.replace(prefix, protocol, 1)
+    return None
+
+
+def list_directory(path: str) -> FrozenSet[str]:
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
+
+@functools.lru_cache(maxsize=64)
+def wkt_to_epsg(wkt: str) -> Optional[int]:
+    # Looking up the EPSG code searches the PROJ database, which is slow.
+    from rasterio.crs import CRS
+
+    epsg: Optional[int] = CRS.from_wkt(wkt).to_epsg()
+    return epsg
+
+
+@functools.lru_cache(maxsize=64)
+def wkt_to_projjson(wkt: str) -> Dict[str, Any]:
+    # Converting to PROJJSON is slow and GEFS files usually share the same CRS.
+    # The returned dict is shared between calls, so copy it before modifying it.
+    from rasterio.crs import CRS
+
+    projjson: Dict[str, Any] = CRS.from_wkt(wkt).to_dict(projjson=True)
+    return projjson
+
+
 def bbox_to_polygon(b: List[float]) -> Dict[str, Any]:
+    # The bbox is ordered west, north, east, south.
+    # Lists are required, JSON Schema validation doesn't accept tuples as arrays.
+    [w, n, e, s] = b
     return {
         "type": "Polygon",
-        "coordinates": [
-            [[b[0], b[3]], [b[2], b[3]], [b[2], b[1]], [b[0], b[1]], [b[0], b[3]]]
-        ],
+        "coordinates": [[[w, s], [e, s], [e, n], [w, n], [w, s]]],
     }
 
 
@@ -401,9 +935,18 @@ def temporal_to_iso(temporal: Union[datetime, int]) -> str:
     return datetime_to_str(temporal)
 
 
-def parse_discipline(str: str) -> str:
-    return parse_bracket_str(str).lower()
+@functools.lru_cache(maxsize=512)
+def parse_discipline(s: str) -> str:
+    return parse_bracket_str(s).lower()
+
+
+@functools.lru_cache(maxsize=64)
+def parse_grib_ids(s: str) -> Dict[str, str]:
+    # The GRIB IDs are usually the same for all bands of a file.
+    # Don't modify the returned dict as it is shared between calls.
+    return dict(entry.split("=", 1) for entry in s.split() if "=" in entry)
 
 
-def parse_bracket_str(str: str) -> str:
-    return re.sub(r"\d+\(([^\)]+)\)$", r"\1", str)
+@functools.lru_cache(maxsize=512)
+def parse_bracket_str(s: str) -> str:
+    return _BRACKET_RE.sub(r"\1", s)
@@ -43,3 +43,38 @@ class CommandsTest(CliTestCase):
             # assert item.id == "my-item-id"
 
             item.validate()
+
+    def test_create_item_with_stats(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            infile = "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000"
+            destination = os.path.join(tmp_dir, "item.json")
+            result = self.run_command(
+                f"noaa-gefs create-item {infile} {destination} --stats"
+            )
+            assert result.exit_code == 0, "\n{}".format(result.output)
+
+            item = pystac.Item.from_file(destination)
+            for band in item.assets["grib2"].extra_fields["raster:bands"]:
+                assert "statistics" in band
+
+            item.validate()
+
+    def test_create_items(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            infiles = [
+                "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000",
+                "tests/data-files/ncep/wave/gefs.wave.t00z.c00.global.0p25.f000.grib2",
+            ]
+            sources = os.path.join(tmp_dir, "sources.txt")
+            with open(sources, "w") as f:
+                f.write("\n".join(infiles))
+            destination = os.path.join(tmp_dir, "items")
+            result = self.run_command(f"noaa-gefs create-items {sources} {destination}")
+            assert result.exit_code == 0, "\n{}".format(result.output)
+
+            jsons = [p for p in os.listdir(destination) if p.endswith(".json")]
+            assert len(jsons) == 2
+
+            for file in jsons:
+                item = pystac.read_file(os.path.join(destination, file))
+                item.validate()
@@ -1,4 +1,16 @@
-from stactools.noaa_gefs import stac
+import os
+from concurrent.futures import Future
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+import numpy
+import pytest
+import rasterio
+from pytest import MonkeyPatch
+from rasterio.crs import CRS
+from rasterio.io import MemoryFile
+
+from stactools.noaa_gefs import constants, stac
 
 
 def test_create_collection() -> None:
@@ -14,6 +26,23 @@ def test_create_collection() -> None:
     collection.validate()
 
 
+def test_create_collection_does_not_share_bbox() -> None:
+    collection = stac.create_collection()
+    collection.extent.spatial.bboxes[0][0] = 0.0
+    assert constants.GLOBAL_BBOX[0] == -180.0
+
+
+def test_create_collection_does_not_share_item_assets() -> None:
+    collection = stac.create_collection()
+    item_assets = collection.extra_fields["item_assets"]
+    item_assets["grib2"]["raster:bands"] = []
+    item_assets["grib2"]["roles"].append("test")
+
+    collection = stac.create_collection()
+    assert "raster:bands" not in collection.extra_fields["item_assets"]["grib2"]
+    assert constants.GRIB2_ROLES == ["data", "source"]
+
+
 def test_create_item() -> None:
     # Write tests for each for the creation of STAC Items
     # Create the STAC Item...
@@ -21,6 +50,312 @@ def test_create_item() -> None:
 
     # Check that it has some required attributes
     # assert item.id == "my-item-id"
+    for band in item.assets[constants.GRIB2_KEY].extra_fields["raster:bands"]:
+        assert "statistics" not in band
 
     # Validate
     item.validate()
+
+
+def test_create_item_contains_all_bands() -> None:
+    infile = "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000"
+    item = stac.create_item(infile)
+
+    bands = item.assets[constants.GRIB2_KEY].extra_fields["raster:bands"]
+    with rasterio.open(infile, driver="GRIB") as dataset:
+        assert len(bands) == dataset.count
+
+
+def test_create_item_with_statistics() -> None:
+    item = stac.create_item(
+        "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000", compute_stats=True
+    )
+
+    for band in item.assets[constants.GRIB2_KEY].extra_fields["raster:bands"]:
+        assert "statistics" in band
+
+    item.validate()
+
+
+def test_create_items() -> None:
+    infiles = [
+        "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000",
+        "tests/data-files/ncep/chem/gefs.chem.t00z.a2d_0p25.f000.grib2",
+    ]
+    items = stac.create_items(infiles)
+
+    assert len(items) == 2
+    for item, infile in zip(items, infiles):
+        assert item.assets[constants.GRIB2_KEY].href == infile
+        item.validate()
+
+
+def test_create_items_parallel() -> None:
+    infiles = [
+        "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000",
+        "tests/data-files/ncep/chem/gefs.chem.t00z.a2d_0p25.f000.grib2",
+    ]
+    items = list(stac.create_items_parallel(infiles, max_workers=2))
+
+    assert len(items) == 2
+    for item, infile in zip(items, infiles):
+        assert item.assets[constants.GRIB2_KEY].href == infile
+        item.validate()
+
+
+class RecordingExecutor:
+    # Runs the tasks synchronously and records the HREFs of each task
+    tasks: List[Tuple[Any, ...]] = []
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        RecordingExecutor.tasks = []
+
+    def __enter__(self) -> "RecordingExecutor":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> "Future[Any]":
+        RecordingExecutor.tasks.append(args)
+        future: "Future[Any]" = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def create_item_href(asset_href: str, *args: Any) -> str:
+    if asset_href == "error":
+        raise ValueError(asset_href)
+    return asset_href
+
+
+def test_create_items_parallel_submits_each_href(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(stac, "ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(stac, "create_item", create_item_href)
+    hrefs = ["a", "b", "c", "d"]
+    items = list(stac.create_items_parallel(hrefs, max_workers=2))
+
+    assert items == hrefs
+    assert RecordingExecutor.tasks == [(href,) for href in hrefs]
+
+
+def test_create_items_parallel_stops_on_error(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(stac, "ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(stac, "create_item", create_item_href)
+    hrefs = ["error"] + ["a"] * 10
+    with pytest.raises(ValueError):
+        list(stac.create_items_parallel(hrefs, max_workers=1))
+
+    # The error is raised before all files are submitted
+    assert len(RecordingExecutor.tasks) == 2
+
+
+def test_create_item_from_idx() -> None:
+    grib = "tests/data-files/ncep/wave/gefs.wave.t00z.c00.global.0p25.f384.grib2"
+    item = stac.create_item_from_idx(grib + ".idx", grib)
+
+    assert item.properties["forecast:reference_datetime"] == "2022-08-12T00:00:00Z"
+    assert item.properties["forecast:horizon"] == "P16D"
+    assert constants.GRIB2_KEY in item.assets
+    assert constants.IDX_KEY in item.assets
+
+    item.validate()
+
+
+def test_create_item_from_idx_with_time_range() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        grib = os.path.join(tmp_dir, "gefs.wave.t00z.c00.global.0p25.f006.grib2")
+        with open(grib + ".idx", "w") as f:
+            f.write("1:0:d=2022081200:WIND:surface:3 hour fcst:ENS=hi-res ctl\n")
+            f.write("2:8702:d=2022081200:WIND:surface:6 hour fcst:ENS=hi-res ctl\n")
+        item = stac.create_item_from_idx(grib + ".idx", grib)
+
+    assert item.id == "1660273200-1660284000-gefs.wave.t00z.c00.global.0p25.f006"
+    assert item.datetime is None
+    assert item.properties["start_datetime"] == "2022-08-12T03:00:00Z"
+    assert item.properties["end_datetime"] == "2022-08-12T06:00:00Z"
+    assert item.properties["expires"] == "2022-08-12T06:00:00Z"
+    assert item.properties["grib:element"] == "WIND"
+    assert item.properties["proj:shape"] == [1440, 721]
+    assert item.properties["proj:projjson"] == constants.GEFS_PROJJSON
+    assert item.properties["proj:projjson"] is not constants.GEFS_PROJJSON
+
+
+def test_create_item_from_idx_without_forecast_times() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        grib = os.path.join(tmp_dir, "gefs.wave.t00z.c00.global.0p25.f006.grib2")
+        with open(grib + ".idx", "w") as f:
+            f.write("")
+        with pytest.raises(ValueError, match="No GRIB messages found"):
+            stac.create_item_from_idx(grib + ".idx", grib)
+
+        with open(grib + ".idx", "w") as f:
+            f.write("1:0:d=2022081200:WIND:surface:unknown:ENS=hi-res ctl\n")
+        with pytest.raises(ValueError, match="No forecast times found"):
+            stac.create_item_from_idx(grib + ".idx", grib)
+
+
+def test_parse_idx_line() -> None:
+    line = "2:95306:d=2022081200:TMP:2 m above ground:0-6 hour max fcst:ENS=low-res ctl"
+    message = stac.parse_idx_line(line)
+    assert message is not None
+    assert message["offset"] == 95306
+    assert message["ref_time"] == 1660262400
+    assert message["element"] == "TMP"
+    assert message["level"] == "2 m above ground"
+    assert message["forecast_seconds"] == 6 * 3600
+
+    message = stac.parse_idx_line("1:0:d=2022081200:HGT:10 mb:anl:")
+    assert message is not None
+    assert message["forecast_seconds"] == 0
+
+    assert stac.parse_idx_line("") is None
+
+
+def test_find_grid() -> None:
+    grid = stac.find_grid(
+        "tests/data-files/ncep/chem/gefs.chem.t00z.a2d_0p25.f000.grib2"
+    )
+    assert grid is not None
+    assert grid["shape"] == [1440, 721]
+
+    grid = stac.find_grid("tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000")
+    assert grid is not None
+    assert grid["shape"] == [720, 361]
+
+    assert stac.find_grid("gefs.chem.t00z.a2d_1p00.f000.grib2") is None
+
+
+def test_band_statistics() -> None:
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="GTiff", width=2, height=2, count=1, dtype="float32"
+        ) as dataset:
+            dataset.write(numpy.array([[[1, 2], [3, 4]]], dtype="float32"))
+
+        with memfile.open() as dataset:
+            stats = stac.band_statistics(dataset, 1, {}, False)
+            assert stats.min == 1
+            assert stats.max == 4
+            assert stats.mean == 2.5
+
+            tags = {
+                "STATISTICS_MINIMUM": "0",
+                "STATISTICS_MAXIMUM": "10",
+                "STATISTICS_MEAN": "5",
+                "STATISTICS_STDDEV": "1",
+                "STATISTICS_APPROXIMATE": "YES",
+            }
+            # Use the cached statistics unless exact statistics are requested
+            assert stac.band_statistics(dataset, 1, tags, True).max == 10
+            assert stac.band_statistics(dataset, 1, tags, False).max == 4
+
+
+def test_href_exists() -> None:
+    assert stac.href_exists("tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000")
+    assert not stac.href_exists("tests/data-files/ncep/atmos/missing.f000.idx")
+    assert not stac.href_exists("tests/data-files/missing/missing.f000.idx")
+
+    dir_listings: Dict[str, FrozenSet[str]] = {}
+    assert stac.href_exists(
+        "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000", dir_listings
+    )
+    assert not stac.href_exists("tests/data-files/ncep/atmos/missing.idx", dir_listings)
+    assert os.path.abspath("tests/data-files/ncep/atmos") in dir_listings
+    # Unknown protocols can't be checked
+    assert not stac.href_exists("unknown://bucket/missing.f000.idx")
+
+    # GDAL virtual file systems are checked with fsspec if possible
+    local = os.path.abspath("tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000")
+    assert stac.href_exists("/vsicurl/file://" + local)
+    assert not stac.href_exists("/vsicurl/file://" + local + ".missing")
+    assert not stac.href_exists("/vsimem/geavg.t00z.pgrb2a.0p50.f000")
+
+
+def test_vsi_to_url() -> None:
+    assert stac.vsi_to_url("/vsis3/bucket/file.idx") == "s3://bucket/file.idx"
+    assert stac.vsi_to_url("/vsigs/bucket/file.idx") == "gs://bucket/file.idx"
+    assert stac.vsi_to_url("/vsiaz/container/file.idx") == "az://container/file.idx"
+    assert (
+        stac.vsi_to_url("/vsicurl/https://example.com/file.idx")
+        == "https://example.com/file.idx"
+    )
+    assert stac.vsi_to_url("/vsizip/archive.zip/file.idx") is None
+
+
+def test_find_idx_href() -> None:
+    grib = "tests/data-files/ncep/chem/gefs.chem.t00z.a2d_0p25.f000.grib2"
+    assert stac.find_idx_href(grib) == grib + ".idx"
+
+    grib = "tests/data-files/ncep/atmos/geavg.t00z.pgrb2a.0p50.f000"
+    assert stac.find_idx_href(grib) == grib + ".idx"
+
+    grib = "tests/data-files/ncep/wave/gefs.wave.t00z.mean.global.0p25.f000.grib2"
+    assert stac.find_idx_href(grib) is None
+
+    with TemporaryDirectory() as tmp_dir:
+        grib = os.path.join(tmp_dir, "gefs.wave.t00z.c00.global.0p25.f000.grib2")
+        idx = os.path.join(tmp_dir, "gefs.wave.t00z.c00.global.0p25.f000.idx")
+        dir_listings: Dict[str, FrozenSet[str]] = {}
+        assert stac.find_idx_href(grib, dir_listings) is None
+        # Index files written after listing the directory are only found
+        # with a new listing
+        with open(idx, "w") as f:
+            f.write("")
+        assert stac.find_idx_href(grib) == idx
+        assert stac.find_idx_href(grib, dir_listings) is None
+        assert stac.find_idx_href(grib, {}) == idx
+
+
+def test_bbox_to_polygon() -> None:
+    polygon = stac.bbox_to_polygon([-180.125, 90.125, 179.875, -90.125])
+    assert polygon == {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [-180.125, -90.125],
+                [179.875, -90.125],
+                [179.875, 90.125],
+                [-180.125, 90.125],
+                [-180.125, -90.125],
+            ]
+        ],
+    }
+
+
+def test_create_raster_band() -> None:
+    cached = {
+        "dtype": "float64",
+        "statistics": None,
+        "description": None,
+        "unit": None,
+        "offset": 0.0,
+        "scale": 1.0,
+        "tags": {
+            "GRIB_COMMENT": "Temperature [C]",
+            "GRIB_UNIT": "[C]",
+            "GRIB_SHORT_NAME": "2-HTGL",
+            "GRIB_FORECAST_SECONDS": "3600",
+            "GRIB_VALID_TIME": "1660262400",
+        },
+    }
+    band = stac.create_raster_band(cached, False, False, False, False)
+    assert band == {
+        "data_type": "float64",
+        "description": "Temperature",
+        "unit": "C",
+        "grib:short_name": "2-HTGL",
+    }
+
+    band = stac.create_raster_band(cached, False, False, True, True)
+    assert band["forecast:horizon"] == "PT1H"
+    assert band["datetime"] == band["expires"] == "2022-08-12T00:00:00Z"
+
+
+def test_wkt_to_epsg() -> None:
+    assert stac.wkt_to_epsg(CRS.from_epsg(4326).wkt) == 4326
+    sphere = CRS.from_proj4("+proj=longlat +R=6371229 +no_defs")
+    assert stac.wkt_to_epsg(sphere.wkt) is None